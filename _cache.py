@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import time
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "terminalWeather")
+CACHE_PATH = os.path.join(CACHE_DIR, "cache.db")
+DEFAULT_TTL = 600
+
+
+def _connect():
+    """Opens the cache database, creating the directory and table if needed
+    :returns
+        sqlite3.Connection: Connection to the cache database
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    connection = sqlite3.connect(CACHE_PATH)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS cache "
+        "(key TEXT PRIMARY KEY, body BLOB, expires REAL, generated_at REAL, "
+        "etag TEXT, last_modified TEXT)"
+    )
+    for column in ("generated_at REAL", "etag TEXT", "last_modified TEXT"):
+        try:
+            connection.execute(f"ALTER TABLE cache ADD COLUMN {column}")
+        except sqlite3.OperationalError:
+            pass  # column already present
+    return connection
+
+
+def get(key: str):
+    """Looks up a fresh cached response body
+    Args:
+        key (str): Cache key for the request
+    Returns:
+        bytes: Cached response body, or None on miss/expiry
+    """
+    with _connect() as connection:
+        row = connection.execute(
+            "SELECT body FROM cache WHERE key=? AND expires>?", (key, time.time())
+        ).fetchone()
+    return row[0] if row else None
+
+
+def get_any(key: str):
+    """Looks up a cached response body, ignoring expiry
+    Args:
+        key (str): Cache key for the request
+    Returns:
+        bytes: Cached response body (possibly stale), or None if absent
+    """
+    with _connect() as connection:
+        row = connection.execute(
+            "SELECT body FROM cache WHERE key=?", (key,)
+        ).fetchone()
+    return row[0] if row else None
+
+
+def get_meta(key: str):
+    """Looks up a cached body with its validators, ignoring expiry
+    Args:
+        key (str): Cache key for the request
+    Returns:
+        tuple: (body, etag, last_modified), or None if absent
+    """
+    with _connect() as connection:
+        row = connection.execute(
+            "SELECT body, etag, last_modified FROM cache WHERE key=?", (key,)
+        ).fetchone()
+    return row if row else None
+
+
+def touch(key: str, ttl: int = DEFAULT_TTL):
+    """Pushes an entry's expiry out without rewriting its body
+    Args:
+        key (str): Cache key for the request
+        ttl (int): Seconds until the entry expires again
+    """
+    with _connect() as connection:
+        connection.execute(
+            "UPDATE cache SET expires=? WHERE key=?", (time.time() + ttl, key)
+        )
+
+
+def put(
+    key: str,
+    body: bytes,
+    ttl: int = DEFAULT_TTL,
+    etag: str = None,
+    last_modified: str = None,
+):
+    """Stores a response body under the given key with a TTL
+    Args:
+        key (str): Cache key for the request
+        body (bytes): Raw response body to store
+        ttl (int): Seconds until the entry expires
+        etag (str): ETag response header, if the server sent one
+        last_modified (str): Last-Modified response header, if sent
+    """
+    now = time.time()
+    with _connect() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO cache "
+            "(key, body, expires, generated_at, etag, last_modified) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, body, now + ttl, now, etag, last_modified),
+        )
@@ -1,13 +1,51 @@
 import argparse
-import json
+import os
+import time
 import typing
 import sys
-import geocoder
-from configparser import ConfigParser
-from urllib import error, parse, request
-from clint.textui import puts, indent, colored
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from urllib import parse
+
+import _cache
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 
 BASE_WEATHER_API_URL = "http://api.openweathermap.org/data/2.5/weather"
+IPINFO_URL = "https://ipinfo.io/json"
+REQUEST_TIMEOUT = 5
+LOCATION_PATH = os.path.join(_cache.CACHE_DIR, "location.json")
+LOCATION_TTL = 3600
+DAEMON_SOCKET_PATH = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR", "/tmp"), "weatherd.sock"
+)
+
+RED = "\x1b[31m"
+YELLOW = "\x1b[33m"
+BLUE = "\x1b[34m"
+CYAN = "\x1b[36m"
+WHITE = "\x1b[37m"
+RESET = "\x1b[0m"
+
+
+@lru_cache(maxsize=1)
+def _session():
+    """Builds the pooled HTTP session on first use. requests is the
+    heaviest remaining import, so deferring it lets cache-hit and
+    daemon-served runs skip its cost entirely.
+    :returns
+        requests.Session: Session with keep-alive connection pooling
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=10))
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=10))
+    return session
 
 
 def read_user_cli_args():
@@ -20,15 +58,61 @@ def read_user_cli_args():
     parser.add_argument(
         "-c", "--city", nargs="+", type=str, help="enter the city name", required=False
     )
+    parser.add_argument(
+        "--cities",
+        nargs="+",
+        type=str,
+        help="fetch weather for several cities at once",
+        required=False,
+    )
     parser.add_argument(
         "-i",
         "--imperial",
         action="store_true",
         help="display the temperature in imperial units",
     )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=_cache.DEFAULT_TTL,
+        help="seconds before a cached response goes stale",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="skip the on-disk response cache",
+    )
+    parser.add_argument(
+        "--precision",
+        type=int,
+        default=3,
+        help="decimal places kept on detected coordinates (3 is ~111 m)",
+    )
+    parser.add_argument(
+        "--refresh-location",
+        action="store_true",
+        help="re-detect the current location instead of using the cached one",
+    )
+    parser.add_argument(
+        "--allow-stale",
+        action="store_true",
+        help="serve an expired cached response if OpenWeather is unreachable",
+    )
     return parser.parse_args()
 
 
+@lru_cache(maxsize=2)
+def _base_params(imperial: bool = False):
+    """Builds the query parameters shared by every weather request
+    :arg
+        imperial (boolean): Use imperial units for temp
+    :returns
+        dict: units and appid parameters, cached per unit system
+    """
+    units = "imperial" if imperial else "metric"
+    return {"units": units, "appid": _get_api_key()}
+
+
 def build_weather_query_with_city(city_input: typing.List[str], imperial: bool = False):
     """Builds the URL for an API request to OpenWeatherAPI using city name
     Args:
@@ -37,133 +121,443 @@ def build_weather_query_with_city(city_input: typing.List[str], imperial: bool =
     Returns:
         str: URL formatted for call to OpenWeatherAPI
     """
-    api_key = _get_api_key()
+    # Single ASCII tokens with no reserved characters (the common case)
+    # can be embedded as-is, skipping the join and URL-encoding work.
+    if (
+        len(city_input) == 1
+        and city_input[0].isascii()
+        and not any(c in city_input[0] for c in " +&%?#=")
+    ):
+        params = _base_params(imperial)
+        return (
+            f"{BASE_WEATHER_API_URL}?q={city_input[0]}"
+            f"&units={params['units']}&appid={params['appid']}"
+        )
     city_name = " ".join(city_input)
-    url_encoded_city_name = parse.quote_plus(city_name)
-    units = "imperial" if imperial else "metric"
-    url = (
-        f"{BASE_WEATHER_API_URL}?q={url_encoded_city_name}"
-        f"&units={units}&appid={api_key}"
-    )
-    return url
+    query = parse.urlencode({"q": city_name, **_base_params(imperial)})
+    return f"{BASE_WEATHER_API_URL}?{query}"
+
+
+def _round_lat_long(lat_long: typing.List[str], precision: int = 3):
+    """Rounds a lat/long pair so jitter between runs maps to one cache key
+    :arg
+        lat_long (List[str]): List containing the lat and long
+        precision (int): Decimal places to keep (3 is roughly a 111 m grid)
+    :returns
+        [str], list of rounded latitude and longitude
+    """
+    return [f"{float(value):.{precision}f}" for value in lat_long]
 
 
 def build_weather_query_with_lat_long(
-    lat_long: typing.List[str], imperial: bool = False
+    lat_long: typing.List[str], imperial: bool = False, precision: int = 3
 ):
     """Builds the URL for an API request to OpenWeatherAPI using lat long
     :arg
         lat_long (List[str]): List containing the lat and long
         imperial (boolean): Use imperial units for temp
+        precision (int): Decimal places to keep on the coordinates
     :returns
         str: URL formatted for call to OpenWeatherAPI
     """
-    api_key = _get_api_key()
-    units = "imperial" if imperial else "metric"
-    url = (
-        f"{BASE_WEATHER_API_URL}?lat={lat_long[0]}"
-        f"&lon={lat_long[1]}&units={units}&appid={api_key}"
-    )
-    return url
+    lat, lon = _round_lat_long(lat_long, precision)
+    query = parse.urlencode({"lat": lat, "lon": lon, **_base_params(imperial)})
+    return f"{BASE_WEATHER_API_URL}?{query}"
 
 
-def get_weather_data(query_url: str):
-    """Makes API request to OpenWeatherAPI
+def get_weather_data(
+    query_url: str,
+    cache_key: str = None,
+    cache_ttl: int = _cache.DEFAULT_TTL,
+    allow_stale: bool = False,
+):
+    """Makes API request to OpenWeatherAPI, serving from the on-disk
+    cache when a fresh entry exists for the given key
     Args:
         query_url [str]: URL formatted for OpenWeather's API
+        cache_key [str]: Cache key for this request, or None to skip caching
+        cache_ttl [int]: Seconds before a cached response goes stale
+        allow_stale [bool]: Fall back to an expired cache entry on failure
     Returns:
         dict: Weather Information
     """
+    if cache_key is not None:
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return _json.loads(cached)
+
+    # Expired entries can still be revalidated cheaply: send the stored
+    # validators so the server can answer 304 instead of a full body.
+    conditional_headers = {}
+    expired = None
+    if cache_key is not None:
+        expired = _cache.get_meta(cache_key)
+        if expired is not None:
+            if expired[1]:
+                conditional_headers["If-None-Match"] = expired[1]
+            if expired[2]:
+                conditional_headers["If-Modified-Since"] = expired[2]
+
+    import requests
+
     try:
-        response = request.urlopen(query_url)
-    except error.HTTPError as http_error:
-        if http_error.code == 401:
+        response = _session().get(
+            query_url, headers=conditional_headers, timeout=REQUEST_TIMEOUT
+        )
+        if response.status_code == 304 and expired is not None:
+            _cache.touch(cache_key, cache_ttl)
+            return _json.loads(expired[0])
+        response.raise_for_status()
+    except requests.HTTPError:
+        if response.status_code == 401:
             sys.exit("Access denied. Check API key.")
-        elif http_error.code == 404:
+        elif response.status_code == 404:
             sys.exit("Can't find weather data for this city.")
-        else:
-            sys.exit(f"Something went wrong... ({http_error.code}")
+        stale = _stale_cache_fallback(cache_key, allow_stale)
+        if stale is not None:
+            return stale
+        sys.exit(f"Something went wrong... ({response.status_code})")
+    except requests.RequestException:
+        stale = _stale_cache_fallback(cache_key, allow_stale)
+        if stale is not None:
+            return stale
+        sys.exit("Couldn't reach OpenWeather. Check your connection.")
 
-    data = response.read()
+    data = response.content
 
     try:
-        return json.loads(data)
-    except json.JSONDecodeError:
+        weather_data = _json.loads(data)
+    except ValueError:
+        # both orjson.JSONDecodeError and json.JSONDecodeError subclass this
         sys.exit("Couldn't read server response.")
 
+    if cache_key is not None:
+        _cache.put(
+            cache_key,
+            data,
+            cache_ttl,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+    return weather_data
+
+
+def fetch_weather_for_cities(
+    cities: typing.List[str],
+    imperial: bool = False,
+    cache_key_for=None,
+    cache_ttl: int = _cache.DEFAULT_TTL,
+    allow_stale: bool = False,
+):
+    """Fetches weather for several cities concurrently over the pooled session
+    Args:
+        cities (List[str]): City names, one entry per city
+        imperial (boolean): Use imperial units for temp
+        cache_key_for: Callable mapping a city name to its cache key,
+            or None to skip caching
+        cache_ttl (int): Seconds before a cached response goes stale
+        allow_stale (boolean): Fall back to expired cache entries on failure
+    Returns:
+        List[tuple]: (city, weather dict or None, error message or None),
+        in input order
+    """
+    def fetch(city):
+        query_url = build_weather_query_with_city([city], imperial)
+        cache_key = cache_key_for(city) if cache_key_for else None
+        return get_weather_data(query_url, cache_key, cache_ttl, allow_stale)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=min(len(cities), 10)) as executor:
+        futures = [executor.submit(fetch, city) for city in cities]
+        for city, future in zip(cities, futures):
+            try:
+                results.append((city, future.result(), None))
+            except SystemExit as exit_error:
+                # get_weather_data exits on failure; in batch mode a bad
+                # city shouldn't take the other lookups down with it.
+                results.append((city, None, str(exit_error)))
+    return results
+
+
+def _stale_cache_fallback(cache_key: str, allow_stale: bool):
+    """Serves the last cached response, expired or not, after a failed fetch
+    :arg
+        cache_key (str): Cache key for this request, or None if caching is off
+        allow_stale (boolean): Whether the user opted into stale responses
+    :returns
+        dict: Cached weather information, or None if unavailable
+    """
+    if not allow_stale or cache_key is None:
+        return None
+    cached = _cache.get_any(cache_key)
+    if cached is None:
+        return None
+    print(f"    >>> {YELLOW}(stale cache){RESET}")
+    return _json.loads(cached)
+
 
+@lru_cache(maxsize=1)
 def _get_api_key():
-    """Fetch the api_key from the configuration file"""
+    """Fetch the api_key from the environment, falling back to the
+    configuration file. The env var avoids importing and running
+    configparser at all on the common path."""
+    api_key = os.environ.get("OPENWEATHER_API_KEY")
+    if api_key:
+        return api_key
+    return _read_api_key_from_ini()
+
+
+def _read_api_key_from_ini():
+    """Fetch the api_key from secrets.ini. Looks in the user config dir
+    first, then the working directory, so a compiled/installed binary
+    works from anywhere."""
+    from configparser import ConfigParser
+
     config = ConfigParser()
-    config.read("secrets.ini")
-    return config["openweather"]["api_key"]
+    config.read(
+        [
+            os.path.join(
+                os.path.expanduser("~"), ".config", "terminalWeather", "secrets.ini"
+            ),
+            "secrets.ini",
+        ]
+    )
+    try:
+        return config["openweather"]["api_key"]
+    except KeyError:
+        sys.exit(
+            "Missing API key. Set OPENWEATHER_API_KEY or add it to "
+            "secrets.ini under [openweather]."
+        )
+
+
+def _build_cache_key(location: str, imperial: bool = False):
+    """Builds the cache key for a weather request
+    :arg
+        location (str): City name or "lat:lon" pair
+        imperial (boolean): Use imperial units for temp
+    :returns
+        str: Cache key of the form weather:{location}:{units}
+    """
+    units = "imperial" if imperial else "metric"
+    return f"weather:{location.lower()}:{units}"
 
 
-def get_user_current_lat_lng():
-    """Gets the user's current lat long location
+def _json_dumps_bytes(obj):
+    """Serializes to JSON bytes regardless of which parser backend is in use
+    :returns
+        bytes: UTF-8 encoded JSON
+    """
+    payload = _json.dumps(obj)
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return payload
+
+
+def _cached_location(ttl: int = LOCATION_TTL):
+    """Reads the last detected location from disk if still fresh
+    :arg
+        ttl (int): Seconds before the stored location is considered stale
+    :returns
+        [str], list of latitude and longitude, or None if absent/stale
+    """
+    try:
+        with open(LOCATION_PATH, "rb") as location_file:
+            record = _json.loads(location_file.read())
+        if time.time() - record["ts"] < ttl:
+            return record["latlng"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # unreadable or malformed cache files just mean a re-detect
+    return None
+
+
+def _store_location(latlng: typing.List[str]):
+    """Persists the detected location so later runs skip the geocoder
+    :arg
+        latlng (List[str]): List containing the lat and long
+    """
+    payload = _json_dumps_bytes({"latlng": latlng, "ts": time.time()})
+    try:
+        os.makedirs(_cache.CACHE_DIR, exist_ok=True)
+        with open(LOCATION_PATH, "wb") as location_file:
+            location_file.write(payload)
+    except OSError:
+        pass  # failing to cache the location shouldn't break the lookup
+
+
+def get_user_current_lat_lng(refresh: bool = False):
+    """Gets the user's current lat long location, cached on disk for an
+    hour since it rarely changes between invocations
+    :arg
+        refresh (boolean): Skip the cached location and re-detect
     :returns
         [str], list of latitude and longitude
     """
-    g_location = geocoder.ip("me")
-    return g_location.latlng
+    if not refresh:
+        cached = _cached_location()
+        if cached is not None:
+            return cached
+    import requests
 
+    try:
+        response = _session().get(IPINFO_URL, timeout=3)
+        response.raise_for_status()
+        lat, lon = response.json()["loc"].split(",")
+    except (requests.RequestException, KeyError, ValueError):
+        sys.exit("Couldn't determine your current location.")
+    latlng = [lat, lon]
+    _store_location(latlng)
+    return latlng
 
-def weather_output_format(weather_data: dict, imperial: bool):
-    """Formats the weather data for human consumption
+
+def _query_daemon(request_record: dict):
+    """Asks a running weatherd for weather data over its Unix socket
+    :arg
+        request_record (dict): city/imperial/cache_ttl request fields
     :returns
-        str: Human readable weather report
+        dict: Daemon reply with "weather" or "error", or None if no
+        daemon is reachable
     """
-    temperature = weather_data["main"]["temp"]
+    import socket
 
-    city_message = colored.blue(f"{weather_data['name']}")
-    weather_description_message = colored.white(
-        f"{weather_data['weather'][0]['description']}"
-    )
-    temperature_message = temp_color_display_format(temperature, imperial)(
-        temp_display_format(temperature, imperial)
-    )
-    with indent(4, quote=">>>"):
-        puts(f"[{city_message}]: {weather_description_message}, {temperature_message}")
+    if not os.path.exists(DAEMON_SOCKET_PATH):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as daemon_socket:
+            daemon_socket.settimeout(REQUEST_TIMEOUT * 2)
+            daemon_socket.connect(DAEMON_SOCKET_PATH)
+            daemon_socket.sendall(_json_dumps_bytes(request_record) + b"\n")
+            chunks = []
+            while True:
+                chunk = daemon_socket.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                if chunk.endswith(b"\n"):
+                    break
+    except OSError:
+        return None
+    try:
+        return _json.loads(b"".join(chunks))
+    except ValueError:
+        return None
 
 
-def temp_display_format(temperature: str, imperial: bool):
-    """Adjusts temperature display unit
+# Colors for the cold/mild/hot buckets delimited by each printer's
+# thresholds
+_TEMP_COLORS = (CYAN, YELLOW, RED)
+
+
+def _make_printer(unit: str, cold: int, hot: int):
+    """Builds a report printer specialized for one unit system
+    :arg
+        unit (str): Temperature unit suffix (°F or °C)
+        cold (int): Temps at or below this print cyan
+        hot (int): Temps at or above this print red
     :returns
-        str: Temp string with correct unit of measurement
+        func(dict): Printer taking the weather data dict
     """
-    return f"{temperature}°F" if imperial else f"{temperature}°C"
 
+    def printer(weather_data: dict):
+        temperature = weather_data["main"]["temp"]
+        temperature_color = _TEMP_COLORS[(temperature > cold) + (temperature >= hot)]
+        print(
+            f"    >>> [{BLUE}{weather_data['name']}{RESET}]: "
+            f"{WHITE}{weather_data['weather'][0]['description']}{RESET}, "
+            f"{temperature_color}{temperature}{unit}{RESET}"
+        )
+
+    return printer
+
+
+_PRINTERS = {True: _make_printer("°F", 50, 90), False: _make_printer("°C", 10, 32)}
 
-def temp_color_display_format(temperature, imperial: bool):
-    """Colors corresponding to how hot or cold the temperature is
+
+def weather_output_format(weather_data: dict, imperial: bool):
+    """Formats the weather data for human consumption
     :returns
-        func(str): Function that sets the correct temp color on the string.
+        str: Human readable weather report
     """
+    _PRINTERS[imperial](weather_data)
 
-    if imperial:
-        if temperature >= 90:
-            return colored.red
-        elif temperature <= 50:
-            return colored.cyan
-        return colored.yellow
-    else:
-        if temperature >= 32:
-            return colored.red
-        elif temperature <= 10:
-            return colored.cyan
-        return colored.yellow
 
+def main():
+    """CLI entry point: builds the query, fetches, and prints the report"""
+    if sys.platform == "win32":
+        try:
+            import colorama
 
-if __name__ == "__main__":
+            colorama.just_fix_windows_console()
+        except ImportError:
+            pass  # raw escapes still work on modern Windows terminals
     user_args = read_user_cli_args()
+    if user_args.cities:
+        cache_key_for = None
+        if not user_args.no_cache:
+            cache_key_for = partial(_build_cache_key, imperial=user_args.imperial)
+        results = fetch_weather_for_cities(
+            user_args.cities,
+            user_args.imperial,
+            cache_key_for,
+            user_args.cache_ttl,
+            user_args.allow_stale,
+        )
+        for city, weather_data, error_message in results:
+            if weather_data is not None:
+                weather_output_format(weather_data, user_args.imperial)
+            else:
+                print(f"    >>> {RED}[{city}]: {error_message}{RESET}")
+        return
+
+    if not user_args.no_cache and not user_args.refresh_location:
+        # A running weatherd holds a warm session and caches in memory;
+        # ask it first and fall back to the in-process path below.
+        reply = _query_daemon(
+            {
+                "city": user_args.city,
+                "imperial": user_args.imperial,
+                "cache_ttl": user_args.cache_ttl,
+                "allow_stale": user_args.allow_stale,
+                "precision": user_args.precision,
+            }
+        )
+        if reply is not None:
+            if "weather" in reply:
+                weather_output_format(reply["weather"], user_args.imperial)
+                return
+            if "error" in reply:
+                sys.exit(reply["error"])
+
     query_url = None
+    cache_key = None
     if user_args.city:
         query_url = build_weather_query_with_city(user_args.city, user_args.imperial)
+        cache_key = _build_cache_key(" ".join(user_args.city), user_args.imperial)
     else:
-        current_location = get_user_current_lat_lng()
+        # The IP-geolocation round trip and the secrets.ini read are
+        # independent, so overlap them instead of running them back to back.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            location_future = executor.submit(
+                get_user_current_lat_lng, user_args.refresh_location
+            )
+            key_future = executor.submit(_get_api_key)
+            current_location = location_future.result()
+            key_future.result()
+        current_location = _round_lat_long(current_location, user_args.precision)
         query_url = build_weather_query_with_lat_long(
-            current_location, user_args.imperial
+            current_location, user_args.imperial, user_args.precision
+        )
+        cache_key = _build_cache_key(
+            f"{current_location[0]}:{current_location[1]}", user_args.imperial
         )
 
-    weather_data = get_weather_data(query_url)
+    if user_args.no_cache:
+        cache_key = None
+    weather_data = get_weather_data(
+        query_url, cache_key, user_args.cache_ttl, user_args.allow_stale
+    )
     weather_output_format(weather_data, user_args.imperial)
+
+
+if __name__ == "__main__":
+    main()
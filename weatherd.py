@@ -0,0 +1,91 @@
+"""Long-lived weather daemon.
+
+Holds the pooled HTTP session, the parsed API key, and an in-memory
+response cache so CLI invocations skip Python startup and import cost:
+the `weather` CLI sends a one-line JSON request over a Unix socket and
+prints the reply. Start with `python weatherd.py`; when the daemon isn't
+running the CLI transparently falls back to its in-process path.
+"""
+import asyncio
+import os
+import time
+
+import weather
+import _cache
+from weather import _json, _json_dumps_bytes
+
+# cache_key -> (weather dict, expires); sits in front of the on-disk cache
+_MEMORY_CACHE = {}
+
+
+def _lookup(request_record: dict):
+    """Resolves one CLI request to a weather dict, cache-first
+    Args:
+        request_record (dict): city/imperial/cache_ttl request fields
+    Returns:
+        dict: Weather Information
+    """
+    imperial = bool(request_record.get("imperial"))
+    cache_ttl = request_record.get("cache_ttl", _cache.DEFAULT_TTL)
+    allow_stale = bool(request_record.get("allow_stale"))
+    precision = request_record.get("precision", 3)
+    city = request_record.get("city")
+    if city:
+        query_url = weather.build_weather_query_with_city(city, imperial)
+        cache_key = weather._build_cache_key(" ".join(city), imperial)
+    else:
+        lat_long = weather._round_lat_long(
+            weather.get_user_current_lat_lng(), precision
+        )
+        query_url = weather.build_weather_query_with_lat_long(
+            lat_long, imperial, precision
+        )
+        cache_key = weather._build_cache_key(
+            f"{lat_long[0]}:{lat_long[1]}", imperial
+        )
+
+    now = time.time()
+    hit = _MEMORY_CACHE.get(cache_key)
+    if hit is not None and hit[1] > now:
+        return hit[0]
+    weather_data = weather.get_weather_data(query_url, cache_key, cache_ttl, allow_stale)
+    _MEMORY_CACHE[cache_key] = (weather_data, now + cache_ttl)
+    return weather_data
+
+
+async def handle_client(reader, writer):
+    """Serves one CLI connection: reads a JSON line, replies with one"""
+    line = await reader.readline()
+    try:
+        request_record = _json.loads(line)
+        loop = asyncio.get_running_loop()
+        weather_data = await loop.run_in_executor(None, _lookup, request_record)
+        reply = {"weather": weather_data}
+    except SystemExit as exit_error:
+        # get_weather_data exits on failure; surface the message instead
+        # of taking the daemon down
+        reply = {"error": str(exit_error)}
+    except (ValueError, KeyError, TypeError):
+        reply = {"error": "Daemon couldn't understand the request."}
+    writer.write(_json_dumps_bytes(reply) + b"\n")
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def main():
+    """Runs the daemon until interrupted"""
+    if os.path.exists(weather.DAEMON_SOCKET_PATH):
+        os.unlink(weather.DAEMON_SOCKET_PATH)
+    server = await asyncio.start_unix_server(
+        handle_client, path=weather.DAEMON_SOCKET_PATH
+    )
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass